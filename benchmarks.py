@@ -0,0 +1,115 @@
+"""
+Timing benchmarks for the analysis and drawing code.
+
+Run all of them with ``python benchmarks.py``, or pick some by name: ``python benchmarks.py import_pc_math``.
+Benchmarks that need manim are skipped (with a note) when it can't be imported.
+"""
+import itertools
+import subprocess
+import sys
+import time
+
+import numpy as np
+
+
+def time_import(module, repeat=5):
+    # Each import is timed in a fresh interpreter, since that's the cost a new worker process actually pays.
+    timings = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        subprocess.run([sys.executable, "-c", "import " + module], check=True, capture_output=True)
+        timings.append(time.perf_counter() - start)
+    return min(timings)
+
+
+def bench_import_pc_math():
+    baseline = time_import("numpy")
+    return {"pc_math": time_import("pc_math"), "numpy alone": baseline}
+
+
+def bench_import_set_theory():
+    return {"set_theory": time_import("set_theory")}
+
+
+def time_call(function, *args, repeat=3, **kwargs):
+    timings = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        function(*args, **kwargs)
+        timings.append(time.perf_counter() - start)
+    return min(timings)
+
+
+def random_sets(count, card, edo=12, seed=0):
+    rng = np.random.default_rng(seed)
+    return np.argsort(rng.random((count, edo)), axis=1)[:, :card]
+
+
+def bench_prime_forms():
+    from pc_math import prime_form, prime_forms
+    pc_sets = random_sets(20000, 6)
+    return {"prime_form, one at a time": time_call(lambda: [prime_form(pc_set) for pc_set in pc_sets]),
+            "prime_forms, batched": time_call(prime_forms, pc_sets)}
+
+
+def bench_tn_prime_large_edo():
+    from pc_math import tn_prime
+    pc_sets = random_sets(2000, 36, edo=72)
+    return {"tn_prime, 36 notes of 72-EDO": time_call(lambda: [tn_prime(pc_set, 72) for pc_set in pc_sets])}
+
+
+def bench_set_catalog():
+    from set_catalog import SetClassCatalog
+    return {"build, {}-EDO".format(edo): time_call(SetClassCatalog.build, edo, repeat=1) for edo in (12, 16, 19)}
+
+
+def bench_scalar_interval_matrices():
+    from pc_math import scalar_interval_matrix, scalar_interval_matrices
+    scales = random_sets(20000, 7, edo=19)
+    return {"scalar_interval_matrix, one at a time": time_call(lambda: [scalar_interval_matrix(scale, 19)
+                                                                        for scale in scales]),
+            "scalar_interval_matrices, batched": time_call(scalar_interval_matrices, scales, 19)}
+
+
+def bench_brightness_survey():
+    from pc_math import brightness_comps, batch_brightness_comps
+    scales = np.array([scale for scale in itertools.combinations(range(19), 7) if scale[0] == 0])
+    return {"brightness_comps, 500 scales": time_call(lambda: [brightness_comps(scale, 19) for scale in scales[:500]]),
+            "batch_brightness_comps, every 19-EDO heptad": time_call(batch_brightness_comps, scales, 19)}
+
+
+def bench_svg_cache():
+    import music_notation
+    from music_notation import TheoryStaff
+    # cache=False skips manim's SVG cache too, so this really parses the file every time
+    uncached = time_call(lambda: [TheoryStaff(cache=False) for _ in range(10)], repeat=1)
+    music_notation.clear_svg_cache()
+    cached = time_call(lambda: [TheoryStaff() for _ in range(10)], repeat=1)
+    return {"10 TheoryStaffs, parsing each": uncached, "10 TheoryStaffs, cached": cached}
+
+
+BENCHMARKS = {
+    "import_pc_math": bench_import_pc_math,
+    "import_set_theory": bench_import_set_theory,
+    "prime_forms": bench_prime_forms,
+    "tn_prime_large_edo": bench_tn_prime_large_edo,
+    "set_catalog": bench_set_catalog,
+    "scalar_interval_matrices": bench_scalar_interval_matrices,
+    "brightness_survey": bench_brightness_survey,
+    "svg_cache": bench_svg_cache,
+}
+
+
+def main(names):
+    for name in names or BENCHMARKS:
+        try:
+            results = BENCHMARKS[name]()
+        except (ImportError, subprocess.CalledProcessError) as error:
+            print("{}: skipped ({})".format(name, error))
+            continue
+        for label, seconds in results.items():
+            print("{}: {:<44} {:10.4f} s".format(name, label, seconds))
+
+
+if __name__ == "__main__":
+    main(sys.argv[1:])
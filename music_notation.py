@@ -1,5 +1,126 @@
+from bisect import bisect_left
+from collections import OrderedDict
+import hashlib
+import os
+import pickle
+
 from manim import *
 
+# SVG loading
+# Parsing an SVG is the slow part of building a Staff or Score, and lectures build the same staff over and over.
+# load_svg keeps each parsed file (after removing its background and scaling it) for the rest of the process, and
+# hands out deep copies. Call set_svg_cache_dir to also keep them on disk between runs. With cache=False the file is
+# always parsed again and nothing is kept.
+_svg_cache = {}
+_svg_cache_dir = None
+
+
+def set_svg_cache_dir(path):
+    # None turns the on-disk cache off again
+    global _svg_cache_dir
+    _svg_cache_dir = path
+    if path is not None:
+        os.makedirs(path, exist_ok=True)
+
+
+def clear_svg_cache():
+    _svg_cache.clear()
+
+
+def _find_svg(file):
+    # The path manim will actually read, so editing the file invalidates the cache
+    try:
+        from manim.utils.images import get_full_vector_image_path
+        return os.path.abspath(get_full_vector_image_path(file))
+    except (ImportError, OSError):
+        return os.path.abspath(file)
+
+
+def _remove_background(object, scale_factor):
+    object.remove(object[0])
+    object.scale(scale_factor)
+
+
+def load_svg(file, scale_factor=1, stroke_width=0, color=BLACK, cache=True):
+    path = _find_svg(file)
+    mtime = os.path.getmtime(path) if os.path.exists(path) else None
+    key = (path, mtime, stroke_width, str(color), scale_factor)
+    if cache and key in _svg_cache:
+        return _svg_cache[key].copy()
+
+    parsed = None
+    disk_path = None
+    if cache and _svg_cache_dir is not None:
+        disk_path = os.path.join(_svg_cache_dir, hashlib.sha1(repr(key).encode()).hexdigest() + ".pickle")
+        if os.path.exists(disk_path):
+            try:
+                with open(disk_path, "rb") as cached_file:
+                    parsed = pickle.load(cached_file)
+            except (EOFError, pickle.UnpicklingError, AttributeError, ImportError, IndexError, TypeError):
+                # Truncated, or written by a different manim version: parse the SVG again and overwrite it
+                os.remove(disk_path)
+
+    if parsed is None:
+        # manim's own SVG cache ignores edits to the file and would keep every parse alive, so it's bypassed here
+        parsed = SVGMobject(file, stroke_width=stroke_width, color=color, use_svg_cache=False)
+        _remove_background(parsed, scale_factor)
+        if disk_path is not None:
+            try:
+                with open(disk_path, "wb") as cached_file:
+                    pickle.dump(parsed, cached_file)
+            except (pickle.PicklingError, TypeError, AttributeError):
+                # Not every manim version's mobjects pickle; the in-memory cache still works
+                os.remove(disk_path)
+
+    if not cache:
+        return parsed
+    _svg_cache[key] = parsed
+    return parsed.copy()
+
+
+def partition_svg(object, layout, groups=None):
+    """
+    Splits the children of a parsed SVG into named VGroups in one pass, and returns them as a dict.
+    layout is a list of (name, count, size) in SVG order: group name gets count items, each made of the next size
+    children (a VGroup of them, or the child itself when size is 1). Whatever is left over goes in "remainder".
+
+    groups is an explicit alternative to layout, for SVGs whose elements carry IDs (LilyPond can write them):
+    {name: [member, ...]}, where a member is a child index, an SVG id (looked up in object.id_to_vgroup_dict), or a
+    list of those to make one item. Children that no group claims go in "remainder".
+    """
+    children = object.submobjects
+    parts = {}
+    if groups is None:
+        start = 0
+        for name, count, size in layout:
+            stop = start + count * size
+            if size == 1:
+                parts[name] = VGroup(*children[start:stop])
+            else:
+                parts[name] = VGroup(*[VGroup(*children[i:i + size]) for i in range(start, stop, size)])
+            start = stop
+        parts["remainder"] = VGroup(*children[start:])
+        return parts
+
+    ids = getattr(object, "id_to_vgroup_dict", {})
+
+    def resolve(member):
+        if isinstance(member, str):
+            found = ids[member]
+            return found[0] if len(found.submobjects) == 1 else found
+        if isinstance(member, (list, tuple, range)):
+            return VGroup(*[resolve(part) for part in member])
+        return children[member]
+
+    claimed = set()
+    for name, members in groups.items():
+        parts[name] = VGroup(*[resolve(member) for member in members])
+        claimed.update(id(mob) for mob in parts[name].get_family())
+    if "remainder" not in parts:
+        parts["remainder"] = VGroup(*[child for child in children if id(child) not in claimed])
+    return parts
+
+
 class Staff(VGroup):
     # The idea here is to make initializing a staff define some parameters for the scene
     # like get_start to figure out the x coordinate that's as close as proper to the key sig
@@ -11,31 +132,22 @@ class Staff(VGroup):
       The staff lines should be ordered in a peculiar way: staves from top to bottom, but lines from bottom to top
       within a staff. Thus, in a piano grand staff, the treble E should be line 0 and bass A should be line 9.
     - There should be no objects to the right of the 'signature' group (e.g. tempo indication, clef, key sig, etc.)
+
+    Instead of relying on that order, groups can map "line" to the staff lines' indices or SVG ids (see partition_svg).
     """
-    def __init__(self, file, num_staves=1, scale_factor=1, **kwargs):
-        self.staff = SVGMobject(file, stroke_width=0, color=BLACK)
-        self.remove_background(self.staff, scale_factor)
-        self.group_lines(self.staff, num_staves)
-        self.group_remainder(self.staff, num_staves)
+    def __init__(self, file, num_staves=1, scale_factor=1, cache=True, groups=None, **kwargs):
+        self.staff = load_svg(file, scale_factor=scale_factor, cache=cache)
+        self.group_submobjects(self.staff, num_staves, groups)
 
         VGroup.__init__(self, *[self.line, self.remainder], **kwargs)
 
     def remove_background(self, object, scale_factor):
-        object.remove(object[0])
-        object.scale(scale_factor)
-
-    def group_lines(self, object, num_staves):
-        self.line = VGroup()
-        for line in range(5 * num_staves):
-            new_line = object[line]
-            self.line.add(new_line)
-
-    def group_remainder(self, object, num_staves):
-        self.remainder = VGroup()
-        for i in range(5 * num_staves, len(object.submobjects)):
-            symbol = object[i]
-            self.remainder.add(symbol)
-            # VGroup().get_y
+        _remove_background(object, scale_factor)
+
+    def group_submobjects(self, object, num_staves, groups=None):
+        parts = partition_svg(object, [("line", 5 * num_staves, 1)], groups)
+        self.line = parts["line"]
+        self.remainder = parts["remainder"]
 
     def get_space(self):
         return self.line[1].get_y() - self.line[0].get_y()
@@ -72,11 +184,10 @@ class TheoryStaff(Staff):
         self.notewidth = self.notehead.get_width()
         self.note_buff = (self.notehead.get_critical_point(LEFT) - self.remainder[0].get_critical_point(RIGHT))[0]
 
-        self.misc = VGroup()
-
-        for i in range(8):
-            self.misc.add(self.remainder[-1])
-            self.remainder.remove(self.remainder[-1])
+        # The last 8 symbols aren't part of the staff; misc holds them last to first
+        symbols = self.remainder.submobjects
+        self.misc = VGroup(*symbols[:-9:-1])
+        self.remainder.submobjects = symbols[:-8]
 
     def note(self, position, accidental):
         # 0 = none, -1 = flat, +1 = sharp; +3 is natural; +/-2 are doubles; -3 and -4 create a step cluster.
@@ -221,14 +332,14 @@ class Score(VGroup):
 
     num_notes should count how many notes in the score. (Voices sharing a note head or stem DO count separately.)
 
+    If the SVG has IDs (or you'd rather list indices than reorder layers), pass groups instead of relying on the order
+    above: e.g. {"note": ["note-1", "note-2", [12, 13, 14]], "barline": ["bar-1"]}. See partition_svg.
+
     Note to self: maybe later add a method that attaches other objects like ledger lines & articulations to notes.
     """
-    def __init__(self, file, num_notes, num_barlines, phonebook, scale_factor=1, **kwargs):
-        self.score = SVGMobject(file, stroke_width=0, color=BLACK)
-        self.remove_background(self.score, scale_factor)
-        self.group_notes(self.score, num_notes)
-        self.group_barlines(self.score, num_notes, num_barlines)
-        self.group_remainder(self.score, num_notes, num_barlines)
+    def __init__(self, file, num_notes, num_barlines, phonebook, scale_factor=1, cache=True, groups=None, **kwargs):
+        self.score = load_svg(file, scale_factor=scale_factor, cache=cache)
+        self.group_submobjects(self.score, num_notes, num_barlines, groups)
         if phonebook is not None:
             self.attach(self.score, phonebook)
 
@@ -236,36 +347,33 @@ class Score(VGroup):
         # VGroup.__init__(self, *[self.note, self.barline], **kwargs)
 
     def remove_background(self, object, scale_factor):
-        object.remove(object[0])
-        object.scale(scale_factor)
-
-    def group_notes(self, object, num_notes):
-        self.note = VGroup()
-        for note in range(num_notes):
-            new_note = object[slice(3*note, (3*note)+3)]
-            self.note.add(new_note)
-
-    def group_barlines(self, object, num_notes, num_barlines):
-        self.barline = VGroup()
-        for barline in range(num_barlines):
-            bar = object[(3*num_notes) + barline]
-            self.barline.add(bar)
-
-    def group_remainder(self, object, num_notes, num_barlines):
-        self.remainder = VGroup()
-        for i in range((3*num_notes)+num_barlines, len(object.submobjects)):
-            symbol = object[i]
-            self.remainder.add(symbol)
+        _remove_background(object, scale_factor)
+
+    def group_submobjects(self, object, num_notes, num_barlines, groups=None):
+        parts = partition_svg(object, [("note", num_notes, 3), ("barline", num_barlines, 1)], groups)
+        self.note = parts["note"]
+        self.barline = parts.get("barline", VGroup())
+        self.remainder = parts["remainder"]
 
     def attach(self, object, phonebook):
         # This expects a dictionary as the phonebook, such as { 0: [27, 31], 5: [40], 6: [41, 42] }
+        # Accessories move from barline/remainder into their note. An object that's already part of a note, or that's
+        # listed for more than one note, is copied, since a mobject can't be drawn in two places at once.
+        in_note = {id(mob) for mob in self.note.get_family()}
+        claimed = set()
+        attached = set()
         for num, accessories in phonebook.items():
-            source = object.copy()
             for x in accessories:
-                accessory = source[x]
+                x = range(len(object.submobjects))[x]
+                accessory = object[x]
+                if x in claimed or id(accessory) in in_note:
+                    accessory = accessory.copy()
+                claimed.add(x)
+                attached.add(id(object[x]))
                 self.note[num].add(accessory)
-                self.barline.remove(object[x])
-                self.remainder.remove(object[x])
+        # One pass over each group instead of a remove() per accessory
+        self.barline.submobjects = [bar for bar in self.barline.submobjects if id(bar) not in attached]
+        self.remainder.submobjects = [symbol for symbol in self.remainder.submobjects if id(symbol) not in attached]
 
 
 def StaffAlign(score, staff):
@@ -274,16 +382,194 @@ def StaffAlign(score, staff):
     score.shift(staff.line[4].get_critical_point(UP) - score.barline[0].get_critical_point(UP))
     score.align_to(staff, RIGHT)
 
+class PagedScore:
+    """
+    A long score split into several SVGs (one per system or page), loaded only when needed.
+    systems lists the Score arguments for each SVG, either as a tuple (file, num_notes, num_barlines, phonebook) or as
+    a dict of keyword arguments. A system is parsed the first time it's asked for, and StaffAlign'ed to staff if one
+    is given. Systems that aren't on screen are dropped again, least recently used first, once the loaded systems'
+    geometry goes over memory_budget bytes. Dropped systems get reparsed if they're needed later.
+
+    Typical use:
+        pages = PagedScore(systems, staff=staff)
+        self.add(pages.show(0))
+        self.play(pages.turn_page(0, 1))
+    """
+    def __init__(self, systems, staff=None, scale_factor=1, memory_budget=64 * 2**20):
+        self.systems = [system if isinstance(system, dict) else dict(zip(("file", "num_notes", "num_barlines",
+                                                                          "phonebook"), system))
+                        for system in systems]
+        self.staff = staff
+        self.scale_factor = scale_factor
+        self.memory_budget = memory_budget
+        self.loaded = OrderedDict()  # index: (score, bytes), least recently used first
+        self.shown = set()
+
+    def __len__(self):
+        return len(self.systems)
+
+    def __getitem__(self, i):
+        i = range(len(self.systems))[i]
+        if i in self.loaded:
+            self.loaded.move_to_end(i)
+            return self.loaded[i][0]
+
+        kwargs = dict(scale_factor=self.scale_factor, **self.systems[i])
+        # Neither load_svg's cache nor manim's may keep a system's geometry alive once it's evicted. cache=False skips
+        # both (load_svg passes use_svg_cache=False), so dropping a system from self.loaded really frees it
+        score = Score(cache=False, **kwargs)
+        if self.staff is not None:
+            StaffAlign(score, self.staff)
+        self.loaded[i] = (score, sum(mob.points.nbytes for mob in score.get_family()))
+        # The system being asked for is about to be shown, so it mustn't be the one that's dropped
+        self.evict(keep=i)
+        return score
+
+    def memory_used(self):
+        return sum(size for _, size in self.loaded.values())
+
+    def evict(self, keep=None):
+        # Hidden systems go first, oldest first; systems on screen (and keep) are never dropped
+        for i in [i for i in self.loaded if i not in self.shown and i != keep]:
+            if self.memory_used() <= self.memory_budget:
+                break
+            del self.loaded[i]
+
+    def show(self, i):
+        score = self[i]
+        self.shown.add(range(len(self.systems))[i])
+        return score
+
+    def hide(self, i):
+        self.shown.discard(range(len(self.systems))[i])
+        self.evict()
+
+    def turn_page(self, i, j, **kwargs):
+        # The scene keeps its own references to both scores, so dropping i here can't pull it out from under the
+        # animation. It has to be dropped: the transform morphs its glyphs into j's, so showing i again means reparsing.
+        animation = ScoreReplacementTransform(self.show(i), self.show(j), **kwargs)
+        i = range(len(self.systems))[i]
+        self.shown.discard(i)
+        del self.loaded[i]
+        return animation
+
+
+def _outline(mobject):
+    # All of the mobject's points, relative to its own center, so the same glyph anywhere has the same outline
+    points = [mob.points for mob in mobject.family_members_with_points()]
+    if not points:
+        return None
+    return np.concatenate(points) - mobject.get_center()
+
+
+def _size_cell(outline, cell):
+    # Coarse bucket for an outline: its point count, and its width and height in cells of 4 * tolerance
+    return len(outline), int(np.floor(np.ptp(outline[:, 0]) / cell)), int(np.floor(np.ptp(outline[:, 1]) / cell))
+
+
+def match_elements(old, new, tolerance=0.01):
+    """
+    Pairs up the mobjects in old with identical ones in new: same shape (every point within tolerance, once both are
+    centered), and centers within tolerance.
+    Returns (pairs, unmatched old indices, unmatched new indices), where pairs is a list of (old index, new index).
+    new is bucketed by point count and rough size, and sorted by x within a bucket, so each lookup is a few bisects
+    rather than a scan.
+    """
+    cell = 4 * tolerance
+    buckets = {}
+    new_centers = [mob.get_center() for mob in new]
+    new_outlines = [_outline(mob) for mob in new]
+    for j, outline in enumerate(new_outlines):
+        if outline is not None:
+            buckets.setdefault(_size_cell(outline, cell), []).append((new_centers[j][0], j))
+    for key in buckets:
+        buckets[key].sort()
+        buckets[key] = ([x for x, _ in buckets[key]], [j for _, j in buckets[key]])
+
+    pairs, removed = [], []
+    used = set()
+    for i, mob in enumerate(old):
+        center = mob.get_center()
+        outline = _outline(mob)
+        match = None
+        if outline is not None:
+            count, width, height = _size_cell(outline, cell)
+            # Sizes within tolerance can still fall either side of a cell boundary, so the neighbouring cells are
+            # searched too
+            for key in [(count, width + dw, height + dh) for dw in (-1, 0, 1) for dh in (-1, 0, 1)]:
+                xs, indices = buckets.get(key, ((), ()))
+                k = bisect_left(xs, center[0] - tolerance)
+                while match is None and k < len(xs) and xs[k] <= center[0] + tolerance:
+                    j = indices[k]
+                    if (j not in used and np.linalg.norm(new_centers[j] - center) <= tolerance
+                            and np.allclose(outline, new_outlines[j], rtol=0, atol=tolerance)):
+                        match = j
+                    k += 1
+                if match is not None:
+                    break
+        if match is None:
+            removed.append(i)
+        else:
+            pairs.append((i, match))
+            used.add(match)
+    added = [j for j in range(len(new_centers)) if j not in used]
+    return pairs, removed, added
+
+
+class _Swap(Animation):
+    # Stands in for ReplacementTransforms between identical mobjects: nothing is interpolated while it plays, and the new
+    # mobjects take the old ones' places in the scene at the end.
+    def __init__(self, pairs, **kwargs):
+        super().__init__(Mobject(), introducer=True, **kwargs)
+        self.pairs = pairs
+
+    def _setup_scene(self, scene):
+        pass
+
+    def begin(self):
+        pass
+
+    def finish(self):
+        pass
+
+    def interpolate(self, alpha):
+        pass
+
+    def update_mobjects(self, dt):
+        pass
+
+    def clean_up_from_scene(self, scene):
+        for old, new in self.pairs:
+            try:
+                scene.replace(old, new)
+            except ValueError:
+                scene.add(new)
+
+
 class ScoreReplacementTransform(AnimationGroup):
     """
     NB This mimics the behavior of ReplacementTransform, not Transform
+
+    Notes, bar lines and remainder symbols that are identical in both scores (see match_elements) stay where they are
+    instead of being animated. Notes and bar lines that changed are transformed, paired up in order. Leftover notes and
+    bar lines, and remainder symbols that changed, fade out and in.
     """
-    def __init__(self, score_1, score_2, **kwargs):
-        note_animation = ReplacementTransform(score_1.note, score_2.note)
-        barline_animation = ReplacementTransform(score_1.barline, score_2.barline)
-        old_remainder = FadeOut(score_1.remainder, rate_func=rush_from)
-        new_remainder = FadeIn(score_2.remainder, rate_func=rush_into)
-        # score_1.remove(score_1.remainder)
-        # score_1.add(score_2.remainder)
-
-        AnimationGroup.__init__(self, *[note_animation, barline_animation, old_remainder, new_remainder], **kwargs)
\ No newline at end of file
+    def __init__(self, score_1, score_2, tolerance=0.01, **kwargs):
+        animations = []
+        unchanged = []
+        for group in ("note", "barline", "remainder"):
+            old, new = getattr(score_1, group), getattr(score_2, group)
+            pairs, removed, added = match_elements(old, new, tolerance)
+            unchanged += [(old[i], new[j]) for i, j in pairs]
+            if group != "remainder":
+                animations += [ReplacementTransform(old[i], new[j]) for i, j in zip(removed, added)]
+                removed, added = removed[len(added):], added[len(removed):]
+            # One FadeOut each: a FadeOut of a new VGroup around them would only take that wrapper out of the scene,
+            # and leave the glyphs themselves behind in score_1 at full opacity
+            animations += [FadeOut(old[i], rate_func=rush_from) for i in removed]
+            if added:
+                animations.append(FadeIn(VGroup(*[new[j] for j in added]), rate_func=rush_into))
+        if unchanged:
+            animations.append(_Swap(unchanged))
+
+        AnimationGroup.__init__(self, *animations, **kwargs)
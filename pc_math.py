@@ -0,0 +1,504 @@
+from collections import OrderedDict
+from collections import namedtuple
+from functools import wraps
+
+import numpy as np
+
+# Pure pitch-class set math. Nothing in here may import manim: analysis scripts and worker processes import this
+# module directly, and set_theory.py / scales.py re-export everything for the drawing code.
+
+
+# Caching
+# Lecture builds and analysis scripts ask for the same handful of sets over and over. Calling enable_cache() makes
+# tn_prime, prime_form, scalar_interval_matrix and brightness_comps remember their results, each in its own LRU cache.
+# Cached arrays are read-only, since every caller gets the same array back: copy one before modifying it.
+CacheInfo = namedtuple("CacheInfo", ["hits", "misses", "evictions", "maxsize", "currsize"])
+
+
+class LRUCache:
+    # maxsize=None means unbounded
+    def __init__(self, maxsize=1024):
+        self.maxsize = maxsize
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.entries = OrderedDict()
+
+    def get(self, key):
+        # Returns None on a miss
+        try:
+            value = self.entries[key]
+        except KeyError:
+            self.misses += 1
+            return None
+        self.entries.move_to_end(key)
+        self.hits += 1
+        return value
+
+    def put(self, key, value):
+        self.entries[key] = value
+        self.entries.move_to_end(key)
+        self.trim()
+
+    def trim(self):
+        while self.maxsize is not None and len(self.entries) > self.maxsize:
+            self.entries.popitem(last=False)
+            self.evictions += 1
+
+    def clear(self):
+        self.entries.clear()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def info(self):
+        return CacheInfo(self.hits, self.misses, self.evictions, self.maxsize, len(self.entries))
+
+
+_caches = {}
+_caching_enabled = False
+
+
+def enable_cache(maxsize=1024):
+    global _caching_enabled
+    _caching_enabled = True
+    for cache in _caches.values():
+        cache.maxsize = maxsize
+        cache.trim()
+
+
+def disable_cache():
+    global _caching_enabled
+    _caching_enabled = False
+    clear_cache()
+
+
+def clear_cache():
+    for cache in _caches.values():
+        cache.clear()
+
+
+def cache_info():
+    return {name: cache.info() for name, cache in _caches.items()}
+
+
+def _memoized(key):
+    # key gets the same arguments as the function and returns something hashable that identifies the result
+    def decorator(function):
+        cache = _caches[function.__name__] = LRUCache()
+
+        @wraps(function)
+        def wrapper(*args, **kwargs):
+            if not _caching_enabled:
+                return function(*args, **kwargs)
+            cache_key = key(*args, **kwargs)
+            res = cache.get(cache_key)
+            if res is None:
+                res = function(*args, **kwargs)
+                res.flags.writeable = False
+                cache.put(cache_key, res)
+            return res
+
+        return wrapper
+    return decorator
+
+
+def _set_key(pc_set, edo=12):
+    # For functions that don't care about the order of pc_set
+    if isinstance(pc_set, PcSet):
+        return pc_set.mask, pc_set.edo
+    return tuple(sorted(pc % edo for pc in pc_set)), edo
+
+
+def _sequence_key(pc_set, edo=12, *args):
+    # For functions whose result depends on the order of pc_set
+    if isinstance(pc_set, PcSet):
+        return (pc_set.mask, pc_set.edo) + args
+    return (tuple(pc % edo for pc in pc_set), edo) + args
+
+
+# Set theory
+def rotate_list(pc_set, n=1):
+    n = n % len(pc_set)
+    return list(pc_set[n:]) + list(pc_set[:n])
+
+
+def start_zero(pc_set, edo=12, zero_index=0):
+    pc_set = np.asarray(pc_set)
+    return np.sort(((pc_set % edo) - pc_set[zero_index]) % edo)
+
+
+def least_rotation(sequence):
+    # Booth's algorithm: the index where the lexicographically least rotation of sequence starts, in linear time.
+    # When several rotations tie (periodic sequences), this is the first of them.
+    doubled = list(sequence) * 2
+    failure = [-1] * len(doubled)
+    least = 0
+    for j in range(1, len(doubled)):
+        item = doubled[j]
+        i = failure[j - least - 1]
+        while i != -1 and item != doubled[least + i + 1]:
+            if item < doubled[least + i + 1]:
+                least = j - i - 1
+            i = failure[i]
+        if item != doubled[least + i + 1]:
+            if item < doubled[least]:
+                least = j
+            failure[j - least] = -1
+        else:
+            failure[j - least] = i + 1
+    return least
+
+
+def to_bitmask(pc_set, edo=12):
+    # Bit n is set when pitch class n is in the set.
+    mask = 0
+    for pc in pc_set:
+        mask |= 1 << (int(pc) % edo)
+    return mask
+
+
+def from_bitmask(mask, edo=12):
+    return np.array([pc for pc in range(edo) if mask >> pc & 1], dtype=int)
+
+
+class PcSet:
+    """
+    An immutable, hashable pitch-class set, stored as a bitmask (bit n set when pitch class n is in the set).
+    Transposition, inversion, union (|), intersection (&), difference (-) and complement (~) are all integer
+    operations, so nothing gets allocated in loops that only combine and compare sets.
+    Iterating gives the pitch classes in ascending order, and np.array(pc_set) works too.
+    """
+    __slots__ = ("mask", "edo")
+
+    def __init__(self, pitch_classes=(), edo=12):
+        object.__setattr__(self, "mask", to_bitmask(pitch_classes, edo))
+        object.__setattr__(self, "edo", edo)
+
+    @classmethod
+    def from_mask(cls, mask, edo=12):
+        res = cls(edo=edo)
+        object.__setattr__(res, "mask", mask & ((1 << edo) - 1))
+        return res
+
+    def __setattr__(self, name, value):
+        raise AttributeError("PcSet is immutable")
+
+    def __delattr__(self, name):
+        raise AttributeError("PcSet is immutable")
+
+    def __reduce__(self):
+        return PcSet.from_mask, (self.mask, self.edo)
+
+    def __repr__(self):
+        return "PcSet({}, edo={})".format(list(self), self.edo)
+
+    def __hash__(self):
+        return hash((self.mask, self.edo))
+
+    def __eq__(self, other):
+        if not isinstance(other, PcSet):
+            return NotImplemented
+        return self.mask == other.mask and self.edo == other.edo
+
+    def __len__(self):
+        return bin(self.mask).count("1")
+
+    def __iter__(self):
+        mask = self.mask
+        pc = 0
+        while mask:
+            if mask & 1:
+                yield pc
+            mask >>= 1
+            pc += 1
+
+    def __contains__(self, pc):
+        return bool(self.mask >> (int(pc) % self.edo) & 1)
+
+    def __array__(self, dtype=None, copy=None):
+        return from_bitmask(self.mask, self.edo).astype(dtype or int)
+
+    def _check_edo(self, other):
+        if other.edo != self.edo:
+            raise ValueError("Can't combine sets from {}-EDO and {}-EDO".format(self.edo, other.edo))
+
+    def __or__(self, other):
+        self._check_edo(other)
+        return PcSet.from_mask(self.mask | other.mask, self.edo)
+
+    def __and__(self, other):
+        self._check_edo(other)
+        return PcSet.from_mask(self.mask & other.mask, self.edo)
+
+    def __sub__(self, other):
+        self._check_edo(other)
+        return PcSet.from_mask(self.mask & ~other.mask, self.edo)
+
+    def __invert__(self):
+        return self.complement()
+
+    def complement(self):
+        return PcSet.from_mask(~self.mask, self.edo)
+
+    def transpose(self, n):
+        # Rotating the bits up by n adds n to every pitch class
+        n %= self.edo
+        mask = (self.mask << n) | (self.mask >> (self.edo - n))
+        return PcSet.from_mask(mask, self.edo)
+
+    def invert(self, n=0):
+        # TnI. Reversing the bits maps pc to edo - 1 - pc, so rotate by n + 1 afterwards.
+        reversed_mask = int(format(self.mask, "0{}b".format(self.edo))[::-1], 2)
+        return PcSet.from_mask(reversed_mask, self.edo).transpose(n + 1)
+
+    def tn_prime(self):
+        return PcSet(tn_prime(self), self.edo)
+
+    def prime_form(self):
+        return PcSet(prime_form(self), self.edo)
+
+
+@_memoized(_set_key)
+def tn_prime(pc_set, edo=12):
+    # Returns a np.array. set can be a list, np.array (which is left unsorted) or PcSet
+    if isinstance(pc_set, PcSet):
+        edo = pc_set.edo
+    pc_set = np.sort(np.asarray(pc_set) % edo)
+    card = len(pc_set)
+    if card == 0:
+        return np.zeros(0)
+
+    # The mode that's most packed to the left has the largest interval last, then the largest interval before that,
+    # and so on. So read the interval succession backwards and find its greatest rotation; the mode starts on the note
+    # just after the interval that rotation begins with. Symmetrical sets like (0, 4, 6, 10) have several equally good
+    # rotations, all of which give the same mode.
+    intervals = np.diff(pc_set, append=pc_set[0] + edo)
+    start = (card - least_rotation(-intervals[::-1])) % card
+    return ((np.roll(pc_set, -start) - pc_set[start]) % edo).astype(float)
+
+
+@_memoized(_set_key)
+def prime_form(pc_set, edo=12):
+    # Returns a np.array. set can be a list, np.array or PcSet
+    if isinstance(pc_set, PcSet):
+        edo = pc_set.edo
+        pc_set = np.asarray(pc_set)
+    card = len(pc_set)
+
+    if card == 0:
+        return np.array(0)
+    if card == 1:
+        return np.array([0])
+
+    strange_set = tn_prime(pc_set, edo)
+    charm_set = tn_prime(np.repeat(edo, card) - np.array(pc_set), edo)
+    set_comparison = charm_set - strange_set
+    differences = np.nonzero(set_comparison)
+
+    if len(differences[0]) < 1:
+        return strange_set
+
+    orientation = set_comparison[np.amax(differences)]
+    if orientation < 0:
+        return charm_set
+    else:
+        return strange_set
+
+
+# Batched versions of tn_prime and prime_form, for classifying many sets at once.
+# pc_sets is either an (N, k) array (or list) of sets that all have cardinality k, which gives back an (N, k) float
+# array, or a ragged list of sets, which is grouped by cardinality internally and gives back a list of arrays in input
+# order. Each row matches what the scalar function returns for that set.
+def _packed_rows(modes):
+    # modes has shape (N, m, k). Returns, for each of the N sets, the index of the mode that's most packed to the
+    # left: smallest last entry, ties broken by the next-to-last, and so on.
+    candidates = np.ones(modes.shape[:2], dtype=bool)
+    for i in reversed(range(modes.shape[2])):
+        column = np.where(candidates, modes[:, :, i], np.inf)
+        candidates &= column == column.min(axis=1, keepdims=True)
+    return np.argmax(candidates, axis=1)
+
+
+def _rotation_index(card):
+    # Row i indexes the rotation of a card-note sequence that starts on its ith element
+    return (np.arange(card)[:, np.newaxis] + np.arange(card)[np.newaxis, :]) % card
+
+
+def _tn_prime_array(pc_sets, edo):
+    pc_sets = np.sort(pc_sets % edo, axis=1)
+    count, card = pc_sets.shape
+    modes = np.sort((pc_sets[:, _rotation_index(card)] - pc_sets[:, :, np.newaxis]) % edo, axis=2).astype(float)
+    return modes[np.arange(count), _packed_rows(modes)]
+
+
+def _prime_form_array(pc_sets, edo):
+    orientations = np.stack([_tn_prime_array(pc_sets, edo), _tn_prime_array(edo - pc_sets, edo)], axis=1)
+    return orientations[np.arange(len(pc_sets)), _packed_rows(orientations)]
+
+
+def _batched(function, pc_sets, edo):
+    if isinstance(pc_sets, np.ndarray) and pc_sets.ndim == 2:
+        if pc_sets.shape[1] == 0:
+            return np.zeros(pc_sets.shape)
+        return function(pc_sets, edo)
+
+    cards = [len(pc_set) for pc_set in pc_sets]
+    if len(set(cards)) == 1 and cards[0] > 0:
+        return function(np.array(pc_sets), edo)
+
+    res = [None] * len(cards)
+    for card in set(cards):
+        members = [i for i, size in enumerate(cards) if size == card]
+        if card == 0:
+            forms = np.zeros((len(members), 0))
+        else:
+            forms = function(np.array([pc_sets[i] for i in members]), edo)
+        for i, form in zip(members, forms):
+            res[i] = form
+    return res
+
+
+def tn_primes(pc_sets, edo=12):
+    return _batched(_tn_prime_array, pc_sets, edo)
+
+
+def prime_forms(pc_sets, edo=12):
+    return _batched(_prime_form_array, pc_sets, edo)
+
+
+# Scales
+@_memoized(_sequence_key)
+def scalar_interval_matrix(pc_set, edo=12):
+    # Column i is the mode starting on the ith note of pc_set
+    if isinstance(pc_set, PcSet):
+        edo = pc_set.edo
+    return scalar_interval_matrices(np.asarray(pc_set)[np.newaxis], edo)[0]
+
+
+def scalar_interval_matrices(pc_sets, edo=12):
+    # Takes an (N, k) array of scales and returns an (N, k, k) array, stacking their scalar interval matrices.
+    # Every rotation of every scale comes from one fancy index; then each is transposed to start on zero, as start_zero
+    # does.
+    pc_sets = np.asarray(pc_sets)
+    rotations = pc_sets[:, _rotation_index(pc_sets.shape[1])]
+    res = np.sort(((rotations % edo) - rotations[:, :, :1]) % edo, axis=2)
+    return res.transpose(0, 2, 1)
+
+
+def modecompare(pc_set, reference, rounder=10):
+    difference = np.round(np.array(pc_set)-np.array(reference), decimals=rounder)
+    res = np.sum(np.unique(np.sign(difference)))
+    return res.astype(int)
+
+
+@_memoized(lambda pc_set, edo=12, rounder=10: _sequence_key(pc_set, edo, rounder))
+def brightness_comps(pc_set, edo=12, rounder=10):
+    # Entry (i, j) is modecompare(mode i, mode j): 1 if mode i is brighter, -1 if darker, 0 if neither or the same
+    if isinstance(pc_set, PcSet):
+        edo = pc_set.edo
+    return batch_brightness_comps(np.asarray(pc_set)[np.newaxis], edo=edo, rounder=rounder)[0]
+
+
+def batch_brightness_comps(pc_sets, edo=12, rounder=10, chunk_size=None):
+    # Takes an (N, k) array of scales and returns the (N, k, k) array of their brightness_comps. Every pair of modes
+    # is compared in one broadcast, chunk_size scales at a time. By default the chunk holds about 2**22 mode differences
+    # (32 MB of float64), however large k is, since the (chunk, k, k, k) differences grow with the cube of k.
+    pc_sets = np.asarray(pc_sets)
+    count, card = pc_sets.shape
+    if chunk_size is None:
+        chunk_size = max(1, 2**22 // max(card, 1)**3)
+    res = np.zeros((count, card, card))
+    for start in range(0, count, chunk_size):
+        modes = scalar_interval_matrices(pc_sets[start:start + chunk_size], edo).transpose(0, 2, 1)
+        difference = np.round(modes[:, :, np.newaxis, :] - modes[:, np.newaxis, :, :], decimals=rounder)
+        # The same as summing the distinct signs of each difference, as modecompare does
+        res[start:start + chunk_size] = np.any(difference > 0, axis=3)
+        res[start:start + chunk_size] -= np.any(difference < 0, axis=3)
+    return res
+
+
+def transitive_reduction(adjacency, backend="numpy"):
+    # Takes the adjacency matrix of a directed acyclic graph (any nonzero entry (i, j) is an edge i -> j) and returns a
+    # boolean matrix of just the edges that aren't implied by a longer path. backend="networkx" gets the same answer
+    # from nx.transitive_reduction, for cross-checking; networkx is only imported when it's asked for.
+    adjacency = np.asarray(adjacency) != 0
+    if backend == "networkx":
+        import networkx as nx
+        graph = nx.transitive_reduction(nx.from_numpy_array(adjacency.astype(int), create_using=nx.DiGraph))
+        return nx.to_numpy_array(graph, nodelist=range(len(adjacency))) != 0
+    if backend != "numpy":
+        raise ValueError("Unknown transitive reduction backend: {}".format(backend))
+
+    # Warshall's algorithm for reachability, one row/column broadcast per node
+    reachable = adjacency.copy()
+    for k in range(len(reachable)):
+        reachable |= reachable[:, k, np.newaxis] & reachable[np.newaxis, k, :]
+    implied = (adjacency.astype(int) @ reachable.astype(int)) > 0
+    return adjacency & ~implied
+
+
+# Neo-Riemannian transformations
+# A triad is a (root, quality) pair, with quality "major" or "minor". In other EDOs, or with other Tonnetz intervals,
+# "major" means root, root + diag_interval, root + horiz_interval and "minor" means root,
+# root + horiz_interval - diag_interval, root + horiz_interval: the two triangle shapes of a Tonnetz.
+PLR_OPERATIONS = ("P", "L", "R")
+
+
+def plr_transform(triad, operation, edo=12, horiz_interval=7, diag_interval=4):
+    # P keeps root and fifth, L keeps third and fifth, R keeps root and third. Each one undoes itself.
+    root, quality = triad
+    shift = {"P": 0, "L": diag_interval, "R": diag_interval - horiz_interval}[operation]
+    if quality == "major":
+        return (root + shift) % edo, "minor"
+    return (root - shift) % edo, "major"
+
+
+class PLRGraph:
+    # Every triad of an EDO with the P, L and R moves between them, plus tables of the shortest chain of moves between
+    # any two triads. distance[a, b] is -1 when b can't be reached from a at all.
+    def __init__(self, edo=12, horiz_interval=7, diag_interval=4):
+        self.edo = edo
+        self.triads = [(root, quality) for quality in ("major", "minor") for root in range(edo)]
+        self.number = {triad: n for n, triad in enumerate(self.triads)}
+        count = len(self.triads)
+        self.neighbors = np.array([[self.number[plr_transform(triad, operation, edo, horiz_interval, diag_interval)]
+                                    for operation in PLR_OPERATIONS] for triad in self.triads])
+
+        # Breadth-first search out from every triad. The moves are their own inverses, so distances are symmetric.
+        self.distance = np.full((count, count), -1)
+        for source in range(count):
+            self.distance[source, source] = 0
+            frontier = [source]
+            while frontier:
+                next_frontier = []
+                for triad in frontier:
+                    for neighbor in self.neighbors[triad]:
+                        if self.distance[source, neighbor] < 0:
+                            self.distance[source, neighbor] = self.distance[source, triad] + 1
+                            next_frontier.append(neighbor)
+                frontier = next_frontier
+
+        # next_operation[a, b] is the index into PLR_OPERATIONS of a move from a that gets one step closer to b
+        after_move = self.distance[self.neighbors]
+        closer = (after_move == self.distance[:, np.newaxis, :] - 1) & (self.distance[:, np.newaxis, :] > 0)
+        self.next_operation = np.where(closer.any(axis=1), np.argmax(closer, axis=1), -1)
+
+    def apply(self, triad, operations):
+        # The triads visited by applying a string of operations like "PLR" in order, starting with triad itself
+        res = [triad]
+        for operation in operations:
+            res.append(self.triads[self.neighbors[self.number[res[-1]], PLR_OPERATIONS.index(operation)]])
+        return res
+
+    def shortest_path(self, start, end):
+        # A shortest string of operations taking start to end
+        a, b = self.number[start], self.number[end]
+        if self.distance[a, b] < 0:
+            raise ValueError("No chain of P, L and R moves connects {} and {}".format(start, end))
+        operations = ""
+        while a != b:
+            move = self.next_operation[a, b]
+            operations += PLR_OPERATIONS[move]
+            a = self.neighbors[a, move]
+        return operations
@@ -1,8 +1,11 @@
 from manim import *
-from set_theory import rotate_list
-from set_theory import start_zero
+from pc_math import rotate_list
+from pc_math import start_zero
+from pc_math import scalar_interval_matrix
+from pc_math import modecompare
+from pc_math import brightness_comps
+from pc_math import transitive_reduction
 from set_theory import MuTeX
-import networkx as nx
 
 ROMAN_NUMERALS = ["N", "I", "II", "III", "IV", "V", "VI",
                   "VII", "VIII", "IX", "X", "XI", "XII", "XIII",
@@ -11,35 +14,13 @@ ROMAN_NUMERALS = ["N", "I", "II", "III", "IV", "V", "VI",
                   "XXVIII", "XXIX", "XXX", "XXXI", "XXXII", "XXXIII", "XXXIV"]
 
 
-def scalar_interval_matrix(pc_set, edo=12):
-    res = np.vstack([*[rotate_list(pc_set, i) for i in range(len(pc_set))]])
-    res = np.apply_along_axis(start_zero, 1, res, edo=edo)
-    res = res.transpose()
-    return res
-
-
-def modecompare(pc_set, reference, rounder=10):
-    difference = np.round(np.array(pc_set)-np.array(reference), decimals=rounder)
-    res = np.sum(np.unique(np.sign(difference)))
-    return res.astype(int)
-
-
-def brightness_comps(pc_set, edo=12, rounder=10):
-    card = len(pc_set)
-    res = np.zeros([card, card])
-    modes = scalar_interval_matrix(pc_set, edo=edo)
-    for i in range(card):
-        for j in range(card):
-            res[i, j] = modecompare(modes[:, i], modes[:, j], rounder=rounder)
-    return res
-
-
 class BrightnessGraph(VMobject):
     def __init__(self, pc_set, position_matrix=None, node_names=None,
                  edo=12, arrow_stroke_width=3, arrow_tip_length=.2,
                  pc_scale=.35, pc_color=BLACK, v_buff=0.8, h_buff=.7,
                  rn_scale=.5, rn_color=BLACK,
                  sum_scale=.4, sum_color=BLACK,
+                 reduction_backend="numpy",
                  **kwargs):
         VMobject.__init__(self, **kwargs)
 
@@ -67,12 +48,10 @@ class BrightnessGraph(VMobject):
             new_node[2].next_to(new_node[0], DOWN, buff=SMALL_BUFF).match_x(VGroup(new_node[0], new_node[1]))
             nodes.add(new_node)
 
-        unreduced_matrix = brightness_comps(pc_set=pc_set, edo=edo)
-        unreduced_matrix[unreduced_matrix > 0] = 0
-        unreduced_graph = nx.from_numpy_array(unreduced_matrix, create_using=nx.DiGraph)
-        reduced_graph = nx.transitive_reduction(unreduced_graph)
-        reduced_matrix = nx.adjacency_matrix(reduced_graph)
-        reduced_matrix = reduced_matrix.todense()
+        # Arrows run from each mode to the modes it's darker than, leaving out any implied by a chain of other arrows.
+        # reduction_backend="networkx" does the reduction with networkx instead, if you have it installed.
+        unreduced_matrix = np.minimum(brightness_comps(pc_set=pc_set, edo=edo), 0)
+        reduced_matrix = transitive_reduction(unreduced_matrix, backend=reduction_backend)
 
         # nodes.arrange_in_grid(cols=2, buff=LARGE_BUFF)
 
@@ -0,0 +1,214 @@
+import os
+
+import numpy as np
+
+from pc_math import PcSet
+from pc_math import from_bitmask
+from pc_math import least_rotation
+from pc_math import prime_form
+from pc_math import prime_forms
+from pc_math import tn_prime
+from pc_math import to_bitmask
+
+# Two ways to get at every set class of an EDO. For small EDOs, SetClassCatalog is a table indexed by pc-set bitmask
+# (bit n set when pitch class n is in the set).
+# Build one with get_catalog(edo); the 12-EDO table is built when this module is imported.
+# Past about 24-EDO there are too many subsets for a table, so set_classes() generates the classes one at a time.
+#
+# Labels are Forte-style "cardinality-ordinal" names, with the ordinals assigned in ascending order of prime form.
+# For trichords that agrees with Forte's numbering, but Forte numbered larger sets by hand, so e.g. "4-12" here
+# is not necessarily Forte's 4-12.
+
+
+class SetClassCatalog:
+    def __init__(self, edo, class_index, prime_masks, icvs):
+        self.edo = edo
+        # class_index[mask] is the class number of that set; the other tables are indexed by class number.
+        self.class_index = class_index
+        self.prime_masks = prime_masks
+        self.icvs = icvs
+        self.cardinalities = np.array([bin(int(mask)).count("1") for mask in prime_masks])
+        self.labels = []
+        ordinal = 0
+        for i, card in enumerate(self.cardinalities):
+            ordinal = ordinal + 1 if i > 0 and card == self.cardinalities[i-1] else 1
+            self.labels.append("{}-{}".format(card, ordinal))
+        self.prime_forms = [from_bitmask(int(mask), edo) for mask in prime_masks]
+
+    def __len__(self):
+        # Number of set classes, not of sets
+        return len(self.prime_masks)
+
+    # mask can be an int or a PcSet
+    def set_class(self, mask):
+        if isinstance(mask, PcSet):
+            mask = mask.mask
+        return self.class_index[mask]
+
+    def prime_form(self, mask):
+        return self.prime_forms[self.set_class(mask)]
+
+    def prime_mask(self, mask):
+        return int(self.prime_masks[self.set_class(mask)])
+
+    def cardinality(self, mask):
+        return int(self.cardinalities[self.set_class(mask)])
+
+    def icv(self, mask):
+        return self.icvs[self.set_class(mask)]
+
+    def label(self, mask):
+        return self.labels[self.set_class(mask)]
+
+    def lookup(self, pc_set):
+        # Convenience for when you have pitch classes rather than a bitmask
+        return self.set_class(to_bitmask(pc_set, self.edo))
+
+    @classmethod
+    def build(cls, edo=12):
+        full = (1 << edo) - 1
+        masks = np.arange(1 << edo, dtype=np.int64)
+
+        # Every member of a set class shares the smallest bitmask among its transpositions and inversions.
+        # Reversing the bits maps pc n to edo - 1 - n, which is an inversion followed by a transposition.
+        reversed_masks = np.zeros_like(masks)
+        for pc in range(edo):
+            reversed_masks |= ((masks >> pc) & 1) << (edo - 1 - pc)
+        canonical = masks.copy()
+        for orientation in (masks, reversed_masks):
+            for n in range(edo):
+                rotated = ((orientation << n) | (orientation >> (edo - n))) & full
+                np.minimum(canonical, rotated, out=canonical)
+        representatives, class_index = np.unique(canonical, return_inverse=True)
+        del canonical, reversed_masks
+
+        forms = prime_forms([from_bitmask(int(mask), edo) for mask in representatives], edo)
+        prime_masks = np.array([to_bitmask(form, edo) for form in forms], dtype=np.int64)
+
+        # Renumber the classes by cardinality, then by prime form
+        order = sorted(range(len(forms)), key=lambda i: (len(forms[i]), tuple(forms[i])))
+        renumber = np.empty(len(order), dtype=np.int64)
+        renumber[order] = np.arange(len(order))
+        prime_masks = prime_masks[order]
+
+        icvs = np.zeros((len(prime_masks), edo // 2), dtype=int)
+        for interval in range(1, (edo // 2) + 1):
+            shifted = ((prime_masks << interval) | (prime_masks >> (edo - interval))) & full
+            shared = np.array([bin(int(mask)).count("1") for mask in prime_masks & shifted])
+            if 2 * interval == edo:
+                # The tritone (or its equivalent) pairs every note with itself, so it gets counted twice
+                shared //= 2
+            icvs[:, interval - 1] = shared
+
+        return cls(edo, renumber[class_index].astype(np.int32), prime_masks, icvs)
+
+    def save(self, path):
+        np.savez_compressed(path, edo=self.edo, class_index=self.class_index,
+                            prime_masks=self.prime_masks, icvs=self.icvs)
+
+    @classmethod
+    def load(cls, path):
+        with np.load(path) as data:
+            return cls(int(data["edo"]), data["class_index"], data["prime_masks"], data["icvs"])
+
+
+_CATALOGS = {}
+
+
+def get_catalog(edo=12, cache_dir=None):
+    # Built once per process. With cache_dir, the table is also saved there and loaded instead of rebuilt next time.
+    if edo in _CATALOGS:
+        return _CATALOGS[edo]
+
+    path = None if cache_dir is None else os.path.join(cache_dir, "set_catalog_{}.npz".format(edo))
+    if path is not None and os.path.exists(path):
+        catalog = SetClassCatalog.load(path)
+    else:
+        catalog = SetClassCatalog.build(edo)
+        if path is not None:
+            os.makedirs(cache_dir, exist_ok=True)
+            catalog.save(path)
+
+    _CATALOGS[edo] = catalog
+    return catalog
+
+
+TWELVE_EDO_CATALOG = get_catalog(12)
+
+
+# Set class enumeration for large EDOs
+def _necklaces(edo, card, floor=None):
+    # FKM (Fredricksen-Kessler-Maiorana) generation of the interval successions of card-note sets: card positive
+    # steps adding up to edo, each written as its least rotation, in lexicographic order. Only the word currently being
+    # built is kept, so memory doesn't grow with the number of classes. Words up to and including floor are skipped.
+    word = [0] * (card + 1)
+
+    def extend(t, period, total, tight):
+        if t > card:
+            if card % period == 0 and not tight:
+                yield word[1:]
+            return
+
+        if t == card:
+            # The last step has to close the octave
+            lowest = highest = edo - total
+            if highest < word[t - period]:
+                return
+        elif t == 1:
+            # The first step is the smallest, so it can't be more than an even share of the octave
+            lowest, highest = 1, edo // card
+        else:
+            lowest, highest = word[t - period], edo - total - (card - t) * word[1]
+        if tight:
+            lowest = max(lowest, floor[t - 1])
+
+        for step in range(lowest, highest + 1):
+            word[t] = step
+            new_period = period if t > 1 and step == word[t - period] else t
+            yield from extend(t + 1, new_period, total + step, tight and step == floor[t - 1])
+
+    return extend(1, 1, 0, floor is not None)
+
+
+def _necklace_word(pc_set, edo, inversion):
+    pc_set = np.sort(np.asarray(pc_set) % edo).astype(int)
+    intervals = list(np.diff(pc_set, append=pc_set[0] + edo))
+    n = least_rotation(intervals)
+    word = intervals[n:] + intervals[:n]
+    if inversion:
+        intervals.reverse()
+        n = least_rotation(intervals)
+        word = min(word, intervals[n:] + intervals[:n])
+    return [int(step) for step in word]
+
+
+def set_classes(edo, cardinalities, inversion=True, resume_after=None):
+    """
+    Yields one member of every set class with the given cardinalities (an int, or e.g. a range), in the form
+    prime_form returns, or the form tn_prime returns if inversion=False (so it gives Tn rather than TnI classes).
+    Classes come out cardinality by cardinality, and within a cardinality in lexicographic order of their interval
+    successions.
+
+    To resume, or to split the work between processes, pass one of the yielded forms as resume_after: generation picks
+    up with the class right after it.
+    """
+    if isinstance(cardinalities, int):
+        cardinalities = [cardinalities]
+    cardinalities = [card for card in cardinalities if 0 < card <= edo]
+
+    floor = None
+    if resume_after is not None:
+        cardinalities = cardinalities[cardinalities.index(len(resume_after)):]
+        floor = _necklace_word(resume_after, edo, inversion)
+
+    for card in cardinalities:
+        for word in _necklaces(edo, card, floor if card == len(floor or ()) else None):
+            if inversion:
+                reversed_word = word[::-1]
+                n = least_rotation(reversed_word)
+                if reversed_word[n:] + reversed_word[:n] < word:
+                    # Its inversion comes up (or came up) as a different necklace
+                    continue
+            pc_set = np.cumsum([0] + word[:-1])
+            yield prime_form(pc_set, edo) if inversion else tn_prime(pc_set, edo)
+        floor = None
@@ -1,4 +1,6 @@
 from manim import *
+from pc_math import rotate_list, start_zero, tn_prime, prime_form, PcSet, LRUCache
+from pc_math import PLRGraph, PLR_OPERATIONS
 config.background_color = WHITE
 MuTeX = TexTemplate().add_to_preamble(r"\usepackage{musicography}")
 
@@ -9,72 +11,49 @@ CB_COLORS = [BLUE_E, "#ff8000", "#08ff40", "#e6f219",
              "#33ffff", "#ff3300", "#e64dff", BROWN]
 
 
-# Functions
-def rotate_list(pc_set, n=1):
-    n = n % len(pc_set)
-    res = pc_set[slice(n, len(pc_set))]
-    new_tail = pc_set[slice(0, n)]
-    for item in new_tail:
-        res.append(item)
-    return res
+# Glyphs
+# Every Text is a Pango render and every Tex a LaTeX run, but a scene full of clockfaces keeps asking for the same few
+# dozen digits and letter names. get_glyph builds each one once per process and hands out copies of it.
+_glyph_cache = LRUCache(maxsize=None)
 
 
-def start_zero(pc_set, edo=12, zero_index=0):
-    pc_set = np.array(pc_set)
-    return np.sort(((pc_set % edo) - pc_set[zero_index]) % edo)
-
-
-def tn_prime(pc_set, edo=12):
-    # Returns a np.array. set can be a list or np.array
-    pc_set.sort()
-    card = len(pc_set)
-    modes = np.zeros((card, card))
-
-    for i in range(card):
-        modes[i] = start_zero(pc_set, edo, i)
-
-    # Added these lines 20231015 to deal with problems with inputs like (0, 4, 6, 10)
-    modes = np.unique(modes, axis=0)
-
-    if len(modes) == 1:
-        return modes.flatten()
-
-    card = modes.shape[0]
-
-    preferred_mode = list(range(card))
-    for i in reversed(range(card)):
-        preferred_mode = np.argwhere(modes[:, i] == np.amin(modes[preferred_mode, i]))
-        if len(preferred_mode) < 2:
-            break
-
-    if len(preferred_mode) > 1:
-        preferred_mode = preferred_mode[0]
+def get_glyph(string, font=None, tex_template=None, color=BLACK):
+    # With a font, this is Text(string, font=font); otherwise it's Tex(string, tex_template=tex_template)
+    template_key = None if tex_template is None else tex_template.body
+    key = (string, font, template_key, str(color))
+    prototype = _glyph_cache.get(key)
+    if prototype is None:
+        if font is not None:
+            prototype = Text(string, color=color, font=font)
+        else:
+            prototype = Tex(string, tex_template=tex_template, color=color)
+        _glyph_cache.put(key, prototype)
+    return prototype.copy()
 
-    return modes[preferred_mode].flatten()
 
+def glyph_cache_info():
+    return _glyph_cache.info()
 
-def prime_form(pc_set, edo=12):
-    # Returns a np.array. set can be a list or np.array
-    card = len(pc_set)
 
-    if card == 0:
-        return np.array(0)
-    if card == 1:
-        return np.array([0])
+def clear_glyph_cache():
+    _glyph_cache.clear()
 
-    strange_set = tn_prime(pc_set, edo)
-    charm_set = tn_prime(np.repeat(edo, card) - np.array(pc_set), edo)
-    set_comparison = charm_set - strange_set
-    differences = np.nonzero(set_comparison)
 
-    if len(differences[0]) < 1:
-        return strange_set
+def line_segments(starts, ends, buff=0, **kwargs):
+    # One VMobject holding a straight subpath from each of starts to the matching row of ends (both (N, 3) arrays),
+    # trimmed by buff at each end like Line. Much cheaper to build and draw than N separate Lines.
+    starts = np.asarray(starts, dtype=float)
+    ends = np.asarray(ends, dtype=float)
+    if buff > 0:
+        directions = ends - starts
+        directions *= buff / np.linalg.norm(directions, axis=1, keepdims=True)
+        starts, ends = starts + directions, ends - directions
 
-    orientation = set_comparison[np.amax(differences)]
-    if orientation < 0:
-        return charm_set
-    else:
-        return strange_set
+    segments = VMobject(**kwargs)
+    alphas = np.linspace(0, 1, segments.n_points_per_cubic_curve)[np.newaxis, :, np.newaxis]
+    points = starts[:, np.newaxis, :] + alphas * (ends - starts)[:, np.newaxis, :]
+    segments.set_points(points.reshape(-1, 3))
+    return segments
 
 
 # Objects
@@ -89,7 +68,10 @@ class Clockface(VMobject):
         "note_color": BLUE_E,
         "note_radius": 0.3,
         "letter_names": False,
-        "sub_doubles": False
+        "sub_doubles": False,
+        "labeled_steps": None,
+        "tick_marks": False,
+        "tick_length": 0.1
     }
 
     def __init__(self,
@@ -103,8 +85,13 @@ class Clockface(VMobject):
                  note_radius=0.35,
                  letter_names=False,
                  sub_doubles=False,
+                 labeled_steps=None,
+                 tick_marks=False,
+                 tick_length=0.1,
                  **kwargs):
 
+        # For big EDOs: labeled_steps picks which steps get a digit (say range(0, 72, 6)), and tick_marks marks every
+        # step on the rim, all in one VMobject (self[2]) with tick_length as a fraction of the radius.
         VMobject.__init__(self, **kwargs)
         self.edo = edo
         self.clockface_color = clockface_color
@@ -116,6 +103,9 @@ class Clockface(VMobject):
         self.note_radius = note_radius
         self.letter_names = letter_names
         self.sub_doubles = sub_doubles
+        self.labeled_steps = labeled_steps
+        self.tick_marks = tick_marks
+        self.tick_length = tick_length
 
         if self.letter_names is True:
             self.edo = 12
@@ -129,15 +119,23 @@ class Clockface(VMobject):
         double_subs = ["T", "E", "W", "R", "U", "I", "X", "V", "G", "N", "Y"]
         digits = VGroup()
 
-        for pc in range(self.edo):
+        if self.labeled_steps is None:
+            steps = range(self.edo)
+        else:
+            steps = sorted({step % self.edo for step in self.labeled_steps})
+        # digit_index[pc] is the position of pc's digit in self[0]
+        self.digit_index = {pc: n for n, pc in enumerate(steps)}
+
+        for pc in steps:
             position = self.rotate_vec(-TAU * pc / self.edo, (UP * self.clockface_radius * self.digit_ratio))
             oc.append(position)
             if self.letter_names is False:
-                digit = Text(str(pc), color=self.digit_color, font="Gentium Book Basic")
                 if self.sub_doubles is True and pc > 9:
-                    digit = Text(double_subs[pc-10], color=self.digit_color, font="Gentium Book Basic")
+                    digit = get_glyph(double_subs[pc-10], font="Gentium Book Basic", color=self.digit_color)
+                else:
+                    digit = get_glyph(str(pc), font="Gentium Book Basic", color=self.digit_color)
             else:
-                digit = Tex(pc_letters[pc], tex_template=MuTeX, color=self.digit_color)
+                digit = get_glyph(pc_letters[pc], tex_template=MuTeX, color=self.digit_color)
             digit.scale(self.digit_size)
             digit.move_to(position)
             digits.add(digit)
@@ -149,8 +147,21 @@ class Clockface(VMobject):
         self.add(digits)
         self.add(rim)
 
+        if self.tick_marks is True:
+            directions = np.array([self.rotate_vec(-TAU * pc / self.edo, UP) for pc in range(self.edo)])
+            self.add(line_segments(directions * self.clockface_radius,
+                                   directions * self.clockface_radius * (1 - self.tick_length),
+                                   color=self.clockface_color))
+
     def digit(self, number):
-        return self[0][number]
+        return self[0][self.digit_index[number]]
+
+    def get_noon(self):
+        # Where digit 0 is, or would be if it isn't labeled: a quarter turn on from where the rim's path starts
+        if 0 in self.digit_index:
+            return self.digit(0).get_center()
+        center = self[1].get_center()
+        return center + self.digit_ratio * self.rotate_vec(TAU/4, self[1].points[0] - center)
 
     def get_pcset(self, pitch_classes, **kwargs):
         if "color" not in kwargs:
@@ -161,64 +172,72 @@ class Clockface(VMobject):
 
         circles = VGroup()
         circles.host = self
+        prototype = Circle(**kwargs)
 
-        for pc in pitch_classes:
-            new_circle = Circle(**kwargs)
-            new_circle.move_to(self.n2p(pc))
+        for position in self.numbers_to_points(list(pitch_classes)):
+            new_circle = prototype.copy()
+            new_circle.move_to(position)
             circles.add(new_circle)
 
         # self.add(circles)
         return circles
 
     def get_arc(self, start, stop, radius_scale=1, **kwargs):
-        result_arc = self[1].copy()
+        start_angle = self.points_to_angles(self.numbers_to_points([start]))[0]
+        result_arc = self.get_rim_arc(start_angle, stop - start, radius_scale)
         result_arc.host = self
-        if stop - start > 0:
-            result_arc.reverse_points()
-
-        result_arc.rotate((TAU/4) - self.p2a(Dot().move_to(self.n2p(start))))
-        start_point = 0
-        end_point = (abs(stop - start)/self.edo) % 1
-        result_arc.pointwise_become_partial(result_arc, start_point, end_point)
         result_arc.set_style(**kwargs)
-        result_arc.scale_about_point(radius_scale, self[1].get_center())
         # self.add(result_arc)
         return result_arc
 
+    def get_rim_arc(self, angle, distance, radius_scale=1):
+        # An arc concentric with the rim and styled like it, starting at angle (measured like point_to_angle) and
+        # running distance steps clockwise, or anticlockwise if distance is negative. Built directly rather than by
+        # trimming a copy of the rim, with as many curves as that trimmed copy would have had.
+        rim = self[1]
+        span = (abs(distance)/self.edo) % 1
+        arc = Arc(radius=radius_scale * rim.width / 2,
+                  start_angle=(TAU/4) - angle,
+                  angle=-TAU * span if distance > 0 else TAU * span,
+                  num_components=max(2, int(np.ceil(8 * span)) + 1),
+                  arc_center=rim.get_center())
+        arc.match_style(rim)
+        return arc
+
     def number_to_point(self, number):
-        noon = self.digit(0).get_center() - self[1].get_center()
-        hand_position = self.rotate_vec(TAU * (-number / self.edo), noon)
-        return hand_position + self[1].get_center()
+        return self.numbers_to_points([number])[0]
 
     def point_to_number(self, point):
         # This takes the "note circle" as the point argument
-        coords = point.get_center() - self[1].get_center()
-        x_coord = coords[0]
-        y_coord = coords[1]
-
-        if y_coord > 0:
-            theta = np.arctan(x_coord/y_coord)
-        elif y_coord < 0:
-            theta = PI + np.arctan(x_coord/y_coord)
-        else:
-            theta = (PI/2) * np.sign(x_coord)
-
-        return (self.edo * theta/TAU) % self.edo
+        return self.points_to_numbers([point])[0]
 
     def point_to_angle(self, point):
         # This takes the "note circle" as the point argument
-        coords = point.get_center() - self[1].get_center()
-        x_coord = coords[0]
-        y_coord = coords[1]
-
-        if y_coord > 0:
-            theta = np.arctan(x_coord/y_coord)
-        elif y_coord < 0:
-            theta = PI + np.arctan(x_coord/y_coord)
+        return self.points_to_angles([point])[0]
+
+    def numbers_to_points(self, numbers):
+        # Array version of number_to_point: N numbers in, an (N, 3) array of points out
+        center = self[1].get_center()
+        noon = self.get_noon() - center
+        angles = -TAU * np.asarray(numbers, dtype=float) / self.edo
+        cos, sin = np.cos(angles), np.sin(angles)
+        hand_positions = np.stack([cos*noon[0] - sin*noon[1], sin*noon[0] + cos*noon[1], np.zeros_like(angles)], axis=-1)
+        return hand_positions + center
+
+    def points_to_angles(self, points):
+        # Array version of point_to_angle. points can be an (N, 3) array, or mobjects (a VGroup of note circles, say).
+        # Angles run clockwise from twelve o'clock, between -PI/2 and 3PI/2.
+        if isinstance(points, np.ndarray):
+            coords = np.atleast_2d(points)
         else:
-            theta = (PI/2) * np.sign(x_coord)
+            coords = np.array([point.get_center() for point in points]).reshape(-1, 3)
+        coords = coords - self[1].get_center()
+        theta = np.arctan2(coords[:, 0], coords[:, 1])
+        return np.where(theta < -PI/2, theta + TAU, theta)
 
-        return theta
+    def points_to_numbers(self, points):
+        # Array version of point_to_number
+        return (self.edo * self.points_to_angles(points)/TAU) % self.edo
 
     def n2p(self, number):
         """Abbreviation for number_to_point"""
@@ -259,7 +278,8 @@ class Tonnetz(VMobject):
         "diag_interval": 4,
         "diag_radius": 3,
         "dashed_boundary": True,
-        "all_sharps": False
+        "all_sharps": False,
+        "single_path_lines": False
     }
 
     def __init__(self,
@@ -279,6 +299,7 @@ class Tonnetz(VMobject):
                  diag_radius=3,
                  dashed_boundary=True,
                  all_sharps=False,
+                 single_path_lines=False,
                  **kwargs):
         VMobject.__init__(self, **kwargs)
 
@@ -298,6 +319,7 @@ class Tonnetz(VMobject):
         self.diag_radius = diag_radius
         self.dashed_boundary = dashed_boundary
         self.all_sharps = all_sharps
+        self.single_path_lines = single_path_lines
 
         self.horiz_vector = np.array([self.horiz_dist * np.cos(self.horiz_angle),
                                      self.horiz_dist * np.sin(self.horiz_angle),
@@ -313,6 +335,8 @@ class Tonnetz(VMobject):
 
         self.nodes = self[0]
         self.lines = self[1]
+        self.index_lattice()
+        self.plr_graph = None
 
     def get_nodes(self, **kwargs):
 
@@ -321,46 +345,182 @@ class Tonnetz(VMobject):
             pc_letters = ["C", "C\\sh", "D", "D\\sh", "E", "F", "F\\sh", "G", "G\\sh", "A", "A\\sh", "B"]
         nodes = VGroup()
 
+        # There are only edo different nodes, however big the lattice is, so build each of those once (centered on
+        # the origin) and place copies of it.
+        digit_circle = Circle(radius=self.node_radius,
+                              color=self.node_color,
+                              # fill_color=self.node_fill, fill_opacity=1,
+                              **kwargs)
+        prototypes = {}
+
         for j in range(-self.horiz_radius, self.horiz_radius+1):
             for i in range(-self.diag_radius, self.diag_radius+1):
                 position = ORIGIN + (i * self.diag_vector) + (j * self.horiz_vector)
-                pitch_class_integer = (i*self.diag_interval + j*self.horiz_interval) % self.edo
-
-                if self.letter_names is False:
-                    digit = Tex(str(pitch_class_integer), color=self.node_color)
-                else:
-                    digit = Tex(pc_letters[pitch_class_integer], tex_template=MuTeX,
-                                color=self.node_color)
-                digit.move_to(position)
-                digit_circle = Circle(radius=self.node_radius,
-                                      color=self.node_color,
-                                      # fill_color=self.node_fill, fill_opacity=1,
-                                      **kwargs).move_to(position)
-                node = VGroup(digit_circle, digit)
+                pitch_class_integer = self.pitch_class(i, j)
+
+                if pitch_class_integer not in prototypes:
+                    if self.letter_names is False:
+                        digit = get_glyph(str(pitch_class_integer), color=self.node_color)
+                    else:
+                        digit = get_glyph(pc_letters[pitch_class_integer], tex_template=MuTeX,
+                                          color=self.node_color)
+                    digit.move_to(ORIGIN)
+                    prototypes[pitch_class_integer] = VGroup(digit_circle.copy(), digit)
+
+                node = prototypes[pitch_class_integer].copy().shift(position)
                 nodes.add(node)
 
         self.add(nodes)
 
-    def get_lines(self, **kwargs):
-        lattice = VGroup()
-        # for i in range(-self.diag_radius, self.diag_radius):
-        #     for j in range(-self.horiz_radius, self.horiz_radius):
+    def get_edges(self):
+        # Lattice coordinates of the ends of every line, in the order get_lines draws them
+        edges = []
         for y in range(-self.horiz_radius, self.horiz_radius):
             for x in range(-self.diag_radius, self.diag_radius):
-                lattice.add(Line(start=self.grid(x, y).get_center(), end=self.grid(x, y+1).get_center(),
-                                 buff=self.node_radius, color=self.line_color, **kwargs))
-                lattice.add(Line(start=self.grid(x, y).get_center(), end=self.grid(x+1, y).get_center(),
-                                 buff=self.node_radius, color=self.line_color, **kwargs))
-                lattice.add(Line(start=self.grid(x+1, y).get_center(), end=self.grid(x, y+1).get_center(),
-                                 buff=self.node_radius, color=self.line_color, **kwargs))
+                edges.append(((x, y), (x, y+1)))
+                edges.append(((x, y), (x+1, y)))
+                edges.append(((x+1, y), (x, y+1)))
         for x in range(-self.diag_radius, self.diag_radius):
-            lattice.add(Line(start=self.grid(x, self.horiz_radius).get_center(), end=self.grid(x+1, self.horiz_radius).get_center(),
-                             buff=self.node_radius, color=self.line_color, **kwargs))
+            edges.append(((x, self.horiz_radius), (x+1, self.horiz_radius)))
         for x in range(self.horiz_radius-1, -self.horiz_radius-1, -1):
-            lattice.add(Line(start=self.grid(self.diag_radius, x).get_center(), end=self.grid(self.diag_radius, x+1).get_center(),
-                             buff=self.node_radius, color=self.line_color, **kwargs))
+            edges.append(((self.diag_radius, x), (self.diag_radius, x+1)))
+        return edges
+
+    def get_lines(self, **kwargs):
+        # By default every edge is its own Line. With single_path_lines, each of the three directions (horizontal,
+        # diagonal, cross-diagonal) is instead one VMobject with a subpath per edge, computed straight from the lattice
+        # coordinates. Either way, self.edge_index maps a pair of lattice coordinates to where its line lives, and
+        # get_edge returns something you can highlight.
+        lattice = VGroup()
+        edges = self.get_edges()
+        self.edge_index = {}
+
+        if self.single_path_lines is False:
+            for n, (start, end) in enumerate(edges):
+                lattice.add(Line(start=self.grid(*start).get_center(), end=self.grid(*end).get_center(),
+                                 buff=self.node_radius, color=self.line_color, **kwargs))
+                self.edge_index[self.edge_key(start, end)] = n
+        else:
+            directions = {(0, 1): 0, (1, 0): 1, (-1, 1): 2}
+            families = [[], [], []]
+            for start, end in edges:
+                family = directions[(end[0] - start[0], end[1] - start[1])]
+                self.edge_index[self.edge_key(start, end)] = (family, len(families[family]))
+                families[family].append((start, end))
+            for family in families:
+                coordinates = np.array(family, dtype=float).reshape(-1, 2, 2)
+                points = (coordinates[:, :, 0, np.newaxis] * self.diag_vector
+                          + coordinates[:, :, 1, np.newaxis] * self.horiz_vector)
+                lattice.add(line_segments(points[:, 0], points[:, 1], buff=self.node_radius,
+                                          color=self.line_color, **kwargs))
         self.add(lattice)
 
+    def index_lattice(self):
+        # Precomputes where everything is, so highlighting a pitch class or triad is a lookup rather than a scan over
+        # every node. pc_index maps each pitch class to the lattice coordinates of its nodes; triad_index maps
+        # (root, quality) to the coordinates (i, j) that locate each triangle holding that triad (see triad_corners).
+        self.pc_index = {pc: [] for pc in range(self.edo)}
+        for j in range(-self.horiz_radius, self.horiz_radius+1):
+            for i in range(-self.diag_radius, self.diag_radius+1):
+                self.pc_index[self.pitch_class(i, j)].append((i, j))
+
+        self.triad_index = {(root, quality): [] for root in range(self.edo) for quality in ("major", "minor")}
+        for j in range(-self.horiz_radius, self.horiz_radius):
+            for i in range(-self.diag_radius, self.diag_radius):
+                for quality in ("major", "minor"):
+                    root = self.triad_corners(quality, i, j)[0]
+                    self.triad_index[(self.pitch_class(*root), quality)].append((i, j))
+
+    def pitch_class(self, i, j):
+        return (i*self.diag_interval + j*self.horiz_interval) % self.edo
+
+    @staticmethod
+    def triad_corners(quality, i, j):
+        # Lattice coordinates of root, middle note and "fifth" of the triangle located by (i, j). A "major" triangle
+        # points one way and stacks diag_interval then the rest of horiz_interval on its root; a "minor" triangle
+        # points the other way and stacks them in the opposite order. With the default intervals these are exactly
+        # the major and minor triads.
+        if quality == "major":
+            return (i, j), (i+1, j), (i, j+1)
+        return (i+1, j), (i, j+1), (i+1, j+1)
+
+    def get_pc_nodes(self, pc):
+        return VGroup(*[self.grid(i, j) for i, j in self.pc_index[pc % self.edo]])
+
+    def get_triads(self, root, quality="major"):
+        # Every copy of the triad on the lattice, each as a VGroup of its three nodes
+        return VGroup(*[VGroup(*[self.grid(*corner) for corner in self.triad_corners(quality, i, j)])
+                        for i, j in self.triad_index[(root % self.edo, quality)]])
+
+    def get_triad_edges(self, root, quality="major", **kwargs):
+        # The three lines around every copy of the triad, each copy as a VGroup
+        res = VGroup()
+        for i, j in self.triad_index[(root % self.edo, quality)]:
+            first, second, third = self.triad_corners(quality, i, j)
+            res.add(VGroup(self.get_edge(first, second, **kwargs),
+                           self.get_edge(second, third, **kwargs),
+                           self.get_edge(first, third, **kwargs)))
+        return res
+
+    def get_plr_graph(self):
+        # Built the first time it's needed, for this lattice's edo and intervals
+        if self.plr_graph is None:
+            self.plr_graph = PLRGraph(self.edo, self.horiz_interval, self.diag_interval)
+        return self.plr_graph
+
+    def plr_path_locations(self, start, path):
+        # Lays a chain of P/L/R moves out across the lattice, each triangle sharing an edge with the one before.
+        # start is a (root, quality) triad; path is a string of operations like "PLR", or the triad to end on (then a
+        # shortest chain is used). Returns a (quality, i, j) location for each triangle, as for triad_corners,
+        # starting from the copy of start nearest the middle whose whole path fits on the lattice.
+        start = (start[0] % self.edo, start[1])
+        if not isinstance(path, str):
+            path = self.get_plr_graph().shortest_path(start, (path[0] % self.edo, path[1]))
+
+        # Where each move goes from the triangle at (i, j), for each orientation
+        moves = {"major": {"P": (-1, 0), "R": (0, -1), "L": (0, 0)},
+                 "minor": {"P": (1, 0), "R": (0, 1), "L": (0, 0)}}
+        for i, j in sorted(self.triad_index[start], key=lambda location: location[0]**2 + location[1]**2):
+            locations = [(start[1], i, j)]
+            for operation in path:
+                quality, i, j = locations[-1]
+                di, dj = moves[quality][operation]
+                i, j = i + di, j + dj
+                if not (-self.diag_radius <= i < self.diag_radius and -self.horiz_radius <= j < self.horiz_radius):
+                    break
+                locations.append(("minor" if quality == "major" else "major", i, j))
+            else:
+                return locations
+        raise ValueError("The path {} from {} doesn't fit on this lattice".format(path, start))
+
+    def get_plr_path(self, start, path, **kwargs):
+        # The triangles along plr_path_locations (each a VGroup of its three nodes), and the edge each move pivots on
+        locations = self.plr_path_locations(start, path)
+        triangles = VGroup(*[VGroup(*[self.grid(*corner) for corner in self.triad_corners(*location)])
+                             for location in locations])
+        pivots = VGroup()
+        for before, after in zip(locations, locations[1:]):
+            shared = set(self.triad_corners(*before)) & set(self.triad_corners(*after))
+            pivots.add(self.get_edge(*sorted(shared), **kwargs))
+        return triangles, pivots
+
+    @staticmethod
+    def edge_key(start, end):
+        return tuple(sorted((tuple(start), tuple(end))))
+
+    def get_edge(self, start, end, **kwargs):
+        # The line between two lattice coordinates (each an (i, j) pair, as for grid). In single_path_lines mode the
+        # edge is only a subpath, so this returns a new Line laid over it instead; add that to the scene to highlight.
+        location = self.edge_index[self.edge_key(start, end)]
+        if self.single_path_lines is False:
+            return self.lines[location]
+        return Line(start=self.grid(*start).get_center(), end=self.grid(*end).get_center(),
+                    buff=self.node_radius * self.get_node_scale(), color=self.line_color, **kwargs)
+
+    def get_node_scale(self):
+        # How much the lattice has been scaled since it was built
+        return self.grid(0, 0)[0].width / (2 * self.node_radius)
+
     def grid(self, i, j):
         # Note that I've chosen to index positions like a matrix: row then column.
         # This is opposite your intuitions for how a Cartesian plane would work.
@@ -447,19 +607,9 @@ class Transpose(Succession):
         return Rotate(pc_set, angle=rotate_by, axis=IN, about_point=center, **kwargs)
 
     def get_arrow(self, note, distance, radius_scalar):
-        arrow = note.host[1].copy()
-        if distance > 0:
-            arrow.reverse_points()
-
-        arrow.rotate((TAU/4) - note.host.p2a(note))
-        start_point = 0
-        end_point = (abs(distance)/note.host.edo) % 1
-        arrow.pointwise_become_partial(arrow, start_point, end_point)
-        arrow.scale(radius_scalar)
-
-        if distance != 0:
-            arrow.move_arc_center_to(self.arrow_center)
-        else:
+        arrow = note.host.get_rim_arc(note.host.p2a(note), distance, radius_scalar)
+
+        if distance == 0:
             arrow.next_to(note, note.get_center()-self.arrow_center)
 
         if self.match_note_color:
@@ -501,8 +651,7 @@ class Invert(Succession):
         self.digit_ratio = pc_set.host.digit_ratio
         self.center = pc_set.host[1].get_center()
         tritone = pc_set.host.edo / 2
-        self.point_1 = pc_set.host.n2p(index/2)
-        self.point_2 = pc_set.host.n2p((index/2) + tritone)
+        self.point_1, self.point_2 = pc_set.host.numbers_to_points([index/2, (index/2) + tritone])
         self.tni_axis = self.point_2 - self.point_1
 
         visible_axis = self.create_axis()
@@ -538,10 +687,23 @@ class Invert(Succession):
         return visible_axis
 
 class VoiceLead(AnimationGroup):
-    def __init__(self, pc_set, voice_leading, **kwargs):
+    # With single_updater=True, all the voices move in one VoiceLeadRotation instead of a Transpose each.
+    # show_arrows and arrow_scale then draw the arrows (show_label has no effect).
+    def __init__(self, pc_set, voice_leading, single_updater=False, show_arrows=False, arrow_scale=1.2, **kwargs):
         if "show_label" not in kwargs:
             kwargs["show_label"] = False
 
+        if single_updater:
+            kwargs.pop("show_label")
+            # The timing goes to the rotation, as it goes to each Transpose below; rate_func only once, so the
+            # caller's easing replaces the rotation's default rather than being stacked on it
+            timing = {key: kwargs[key] for key in ("run_time", "rate_func") if key in kwargs}
+            kwargs.pop("rate_func", None)
+            rotation = VoiceLeadRotation(pc_set, voice_leading, show_arrows=show_arrows, arrow_scale=arrow_scale,
+                                         **timing)
+            super().__init__(rotation, **kwargs)
+            return
+
         animations = []
         host = pc_set.host
 
@@ -553,19 +715,81 @@ class VoiceLead(AnimationGroup):
         super().__init__(*animations, **kwargs)
 
 
+class VoiceLeadRotation(Animation):
+    # Moves each note of pc_set round its clock by the matching number of steps in voice_leading (clockwise when
+    # positive), like one Transpose per note but with every note's angle interpolated in a single array operation per
+    # frame. With show_arrows, each note also gets an arc (arrow_scale times the rim's radius) that grows along with it;
+    # they're in self.arrows, and stay on screen afterwards.
+    def __init__(self, pc_set, voice_leading, show_arrows=False, arrow_scale=1.2, **kwargs):
+        self.pc_set = pc_set
+        self.host = pc_set.host
+        self.voice_leading = np.asarray(voice_leading, dtype=float)
+        self.arrows = VGroup()
+        self.full_arrows = VGroup()
+
+        if show_arrows:
+            for note, angle, motion in zip(pc_set, self.host.points_to_angles(pc_set), voice_leading):
+                arrow = self.host.get_rim_arc(angle, motion, arrow_scale)
+                arrow.set_color(note.get_color())
+                self.arrows.add(arrow)
+            self.full_arrows = self.arrows.copy()
+            super().__init__(VGroup(pc_set, self.arrows), **kwargs)
+        else:
+            super().__init__(pc_set, **kwargs)
+
+    def create_starting_mobject(self):
+        # Each frame is computed from the angles saved in begin, so there's no need for a copy of the notes
+        return self.mobject
+
+    def begin(self):
+        self.center = self.host[1].get_center()
+        offsets = np.array([note.get_center() for note in self.pc_set]) - self.center
+        self.start_angles = np.arctan2(offsets[:, 0], offsets[:, 1])
+        self.radii = np.linalg.norm(offsets[:, :2], axis=1)
+        self.z_offsets = offsets[:, 2]
+        super().begin()
+
+    def interpolate_mobject(self, alpha):
+        alpha = self.rate_func(alpha)
+        angles = self.start_angles + (alpha * TAU * self.voice_leading / self.host.edo)
+        positions = self.center + np.stack([self.radii * np.sin(angles),
+                                            self.radii * np.cos(angles),
+                                            self.z_offsets], axis=-1)
+        for note, position in zip(self.pc_set, positions):
+            note.move_to(position)
+        for arrow, full_arrow in zip(self.arrows, self.full_arrows):
+            arrow.pointwise_become_partial(full_arrow, 0, alpha)
+
+
 class RotateClock(AnimationGroup):
     # This rotates anticlockwise, because math. Maybe that's counterintuitive b/c it's applied to a clock...
     def __init__(self, clock, theta, **kwargs):
-        step_angle = -TAU/clock.edo
-
-        basic_arc = Arc(angle=theta,
-                        radius=clock.clockface_radius * clock.digit_ratio).rotate((TAU/4)-clock.p2a(clock.digit(0)))
-        basic_arc.move_arc_center_to(clock[1].get_center())
+        super().__init__(RotateDigits(clock, theta), **kwargs)
 
-        animations = []
-        for i, digit in enumerate(clock[0]):
-            new_arc = basic_arc.copy().rotate(i * step_angle, about_point=clock[1].get_center())
-            animations.append(MoveAlongPath(digit, new_arc))
 
-        super().__init__(*animations, **kwargs)
+class RotateDigits(Animation):
+    # Carries every digit of clock anticlockwise by theta around its center, keeping them upright. Instead of a
+    # MoveAlongPath per digit, each frame rotates all of the digits' starting offsets in one array operation.
+    def __init__(self, clock, theta, **kwargs):
+        self.clock = clock
+        self.theta = theta
+        super().__init__(clock[0], **kwargs)
+
+    def create_starting_mobject(self):
+        # Each frame is computed from the offsets saved in begin, so there's no need for a copy of the digits
+        return self.mobject
+
+    def begin(self):
+        self.center = self.clock[1].get_center()
+        self.offsets = np.array([digit.get_center() for digit in self.clock[0]]).reshape(-1, 3) - self.center
+        super().begin()
+
+    def interpolate_mobject(self, alpha):
+        angle = self.rate_func(alpha) * self.theta
+        cos, sin = np.cos(angle), np.sin(angle)
+        positions = self.center + np.stack([cos * self.offsets[:, 0] - sin * self.offsets[:, 1],
+                                            sin * self.offsets[:, 0] + cos * self.offsets[:, 1],
+                                            self.offsets[:, 2]], axis=-1)
+        for digit, position in zip(self.clock[0], positions):
+            digit.move_to(position)
 